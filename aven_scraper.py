@@ -2,22 +2,35 @@
 Main Aven Support Scraper using Exa.ai API
 """
 import asyncio
-import json
+import csv
 import logging
+import math
+import operator
+import os
+import re
+import sqlite3
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
 from datetime import datetime
-from typing import List, Dict, Any, Set, Optional
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, List, Dict, Any, Set, Optional
 from urllib.parse import urlparse, urljoin
-import pandas as pd
 from tqdm import tqdm
-import os
+from tqdm.asyncio import tqdm as atqdm
 
-from exa_py import Exa
-from tenacity import retry, stop_after_attempt, wait_exponential
+import orjson
 
 from config import config, get_output_paths, validate_config
 from content_processor import ContentProcessor, TextChunk
 
+# The HTTP, Exa.ai and retry libraries are imported where they are first used
+# so that `--help` and other commands that never touch the network start fast
+if TYPE_CHECKING:
+    import aiohttp
+    from exa_py import AsyncExa
+
 # Setup logging
 def setup_logging():
     """Setup logging configuration"""
@@ -33,23 +46,158 @@ def setup_logging():
 
 logger = logging.getLogger(__name__)
 
+# Exa.ai REST endpoint used for page content fetches
+EXA_CONTENTS_URL = "https://api.exa.ai/contents"
+
+# Non-content URLs that are never worth scraping
+EXCLUDED_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png', '.gif', '.css', '.js')
+
+# Columns of the per-page summary CSV
+SUMMARY_CSV_FIELDS = ['url', 'title', 'content_type', 'word_count', 'chunk_count', 'scraped_at']
+
+# TextChunk attributes in declaration order, fetched with a single attrgetter call
+CHUNK_FIELDS = tuple(f.name for f in fields(TextChunk))
+_get_chunk_fields = operator.attrgetter(*CHUNK_FIELDS)
+
+# Chunk files are small and I/O-bound, so writes are spread over a thread pool
+CHUNK_WRITE_WORKERS = 16
+
+def _compile_alternation(patterns: List[str]) -> re.Pattern:
+    """Compile literal substrings into one regex; an empty list never matches"""
+    return re.compile('|'.join(map(re.escape, patterns)) or r'(?!)')
+
+def _render_chunk_markdown(chunk: Dict[str, Any]) -> str:
+    """Render a serialized chunk as a standalone markdown document"""
+    section = f"**Section:** {chunk['section_title']}\n" if chunk['section_title'] else ""
+    return (
+        f"# {chunk['title']}\n\n"
+        f"**Source:** {chunk['source_url']}\n"
+        f"**Type:** {chunk['content_type']}\n"
+        f"{section}"
+        f"**Chunk:** {chunk['chunk_index']}/{chunk['total_chunks']}\n\n"
+        f"---\n\n"
+        f"{chunk['content']}"
+    )
+
+def _write_json(path: str, obj: Any):
+    """Write an object as indented UTF-8 JSON, stringifying unknown types"""
+    with open(path, 'wb') as f:
+        f.write(orjson.dumps(obj, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+
+def _write_text(path: Path, text: str):
+    """Write a UTF-8 text file"""
+    path.write_text(text, encoding='utf-8')
+
+def _is_transient_error(error: BaseException) -> bool:
+    """Whether a failed Exa API request is worth retrying"""
+    import aiohttp
+    import httpx
+    
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (aiohttp.ClientError, httpx.TransportError, asyncio.TimeoutError))
+
+async def _return_exceptions(coro) -> Any:
+    """Await a coroutine, returning any exception instead of raising it"""
+    try:
+        return await coro
+    except Exception as e:
+        return e
+
+def _batched(items: List[str], size: int):
+    """Yield successive slices of at most ``size`` items"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+@dataclass
+class ExaContent:
+    """Page contents returned by the Exa.ai /contents endpoint"""
+    url: str
+    text: Optional[str] = None
+    score: float = 0
+    published_date: Optional[str] = None
+    author: Optional[str] = None
+    highlights: List[str] = field(default_factory=list)
+    highlight_scores: List[float] = field(default_factory=list)
+    id: Optional[str] = None  # The URL as requested; ``url`` may be normalized or redirected
+    
+    @property
+    def requested_url(self) -> str:
+        """The URL this result was requested under"""
+        return self.id or self.url
+    
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'ExaContent':
+        """Build from a camelCase result object in the API response"""
+        return cls(
+            url=data['url'],
+            text=data.get('text'),
+            score=data.get('score') or 0,
+            published_date=data.get('publishedDate'),
+            author=data.get('author'),
+            highlights=data.get('highlights') or [],
+            highlight_scores=data.get('highlightScores') or [],
+            id=data.get('id')
+        )
+
+class ContentCache:
+    """On-disk SQLite cache of Exa.ai page contents keyed by URL, so re-runs skip recent fetches"""
+    
+    def __init__(self, path: str, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS contents '
+            '(url TEXT PRIMARY KEY, fetched_at REAL NOT NULL, payload BLOB NOT NULL)'
+        )
+    
+    def get_many(self, urls: List[str]) -> Dict[str, ExaContent]:
+        """Return the cached contents among urls fetched within the TTL"""
+        cutoff = time.time() - self.ttl_seconds
+        found = {}
+        for url in urls:
+            row = self._db.execute(
+                'SELECT payload FROM contents WHERE url = ? AND fetched_at >= ?', (url, cutoff)
+            ).fetchone()
+            if row is not None:
+                found[url] = ExaContent(**orjson.loads(row[0]))
+        return found
+    
+    def put_many(self, contents: List[ExaContent]):
+        """Store freshly fetched contents that carry page text"""
+        now = time.time()
+        with self._db:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO contents VALUES (?, ?, ?)',
+                [(content.requested_url, now, orjson.dumps(content)) for content in contents if content.text]
+            )
+    
+    def close(self):
+        """Close the underlying database connection"""
+        self._db.close()
+
 class AvenScraper:
     """Main scraper class for Aven support pages using Exa.ai"""
     
     def __init__(self, api_key: Optional[str] = None):
         """Initialize the scraper"""
         self.api_key = api_key or config.exa_api_key
-        self.exa = Exa(self.api_key)
+        
+        # Exa.ai SDK client; its httpx client is bound to an event loop, so it
+        # is created inside each scrape and closed when the scrape ends
+        self.exa: Optional['AsyncExa'] = None
+        
         self.content_processor = ContentProcessor(
             chunk_size=config.chunk_size,
             overlap_size=config.overlap_size,
-            min_chunk_size=config.min_chunk_size
+            min_chunk_size=config.min_chunk_size,
+            fast_markdown=config.fast_markdown
         )
         
         # Tracking
         self.scraped_urls: Set[str] = set()
         self.failed_urls: Set[str] = set()
-        self.all_results: List[Dict[str, Any]] = []
+        self.page_summaries: List[Dict[str, Any]] = []
         self.all_chunks: List[TextChunk] = []
         self.session_stats = {
             'start_time': datetime.now(),
@@ -58,39 +206,123 @@ class AvenScraper:
             'urls_failed': 0,
             'total_chunks': 0,
             'total_words': 0,
-            'content_types': {}
+            'content_types': Counter()
         }
         
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 60.0 / config.requests_per_minute
+        # URL filters, compiled once and memoised per URL
+        self._include_domains = tuple(domain.lower() for domain in config.include_domains)
+        self._target_re = _compile_alternation(config.target_content)
+        self._exclude_re = _compile_alternation(config.exclude_patterns)
+        self._url_filter_cache: Dict[str, bool] = {}
         
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    def _rate_limited_request(self, func, *args, **kwargs):
-        """Execute Exa API request with rate limiting and retry logic"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
+        # Exa results that already carry page text, keyed by URL
+        self._content_cache: Dict[str, Any] = {}
         
-        if time_since_last < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last
-            logger.debug(f"Rate limiting: sleeping for {sleep_time:.2f}s")
-            time.sleep(sleep_time)
+        # Rate limiting: token bucket refilled at requests_per_minute
+        from aiolimiter import AsyncLimiter
         
-        try:
-            result = func(*args, **kwargs)
-            self.last_request_time = time.time()
-            return result
-        except Exception as e:
-            logger.error(f"API request failed: {e}")
-            raise
+        self._limiter = AsyncLimiter(config.requests_per_minute, 60)
+        
+        # HTTP session shared by all direct Exa.ai calls, created on first use
+        self._session: Optional['aiohttp.ClientSession'] = None
+        
+        # NDJSON files that processed pages and their chunks are streamed to during a scrape
+        self._raw_pages_file: Optional[IO[bytes]] = None
+        self._chunks_file: Optional[IO[bytes]] = None
+        
+        # Persistent cache of fetched page contents, open for the duration of a scrape
+        self._contents_cache: Optional[ContentCache] = None
+        
+    async def _get_session(self) -> 'aiohttp.ClientSession':
+        """Return the shared HTTP session, creating it inside the running event loop"""
+        import aiohttp
+        
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100, limit_per_host=20, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=config.timeout_seconds),
+                headers={'x-api-key': self.api_key}
+            )
+        return self._session
+    
+    async def _close_session(self):
+        """Close the shared HTTP session if one was opened"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    def _get_exa(self) -> 'AsyncExa':
+        """Return the Exa.ai SDK client, creating it inside the running event loop"""
+        if self.exa is None:
+            from exa_py import AsyncExa
+            
+            self.exa = AsyncExa(self.api_key)
+        return self.exa
     
-    def discover_support_pages(self) -> List[str]:
-        """Use Exa.ai to discover support pages intelligently"""
+    async def _close_exa(self):
+        """Close the Exa.ai SDK client's HTTP connections if one was created"""
+        if self.exa is not None:
+            await self.exa.client.aclose()
+            self.exa = None
+    
+    async def _get_contents(self, urls: List[str]) -> List[ExaContent]:
+        """Fetch page text and highlights for a list of URLs from the Exa.ai REST API"""
+        session = await self._get_session()
+        payload = {
+            'urls': urls,
+            'text': True,
+            'highlights': {
+                'numSentences': config.num_sentences_per_highlight,
+                'highlightsPerUrl': config.highlights_per_url
+            }
+        }
+        async with session.post(EXA_CONTENTS_URL, json=payload) as response:
+            response.raise_for_status()
+            data = await response.json(loads=orjson.loads)
+        return [ExaContent.from_json(result) for result in data.get('results', [])]
+    
+    async def _rate_limited_request(self, func, *args, **kwargs):
+        """Execute Exa API request once a rate-limit token is available, retrying transient failures"""
+        from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential
+        
+        async for attempt in AsyncRetrying(
+            retry=retry_if_exception(_is_transient_error),
+            stop=stop_after_attempt(3),
+            wait=wait_exponential(multiplier=1, min=4, max=10)
+        ):
+            with attempt:
+                async with self._limiter:
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        logger.error(f"API request failed: {e}")
+                        raise
+    
+    def _max_in_flight(self) -> int:
+        """Number of concurrent requests that keeps us within requests_per_minute"""
+        return max(1, math.ceil(config.requests_per_minute / 60 * config.avg_latency_seconds))
+    
+    def _cache_content(self, result: Any):
+        """Remember an Exa result that already carries page text so it isn't fetched again"""
+        if getattr(result, 'text', None) and result.url not in self._content_cache:
+            self._content_cache[result.url] = result
+    
+    async def discover_support_pages(self) -> List[str]:
+        """
+        Use Exa.ai to discover support pages intelligently.
+        
+        Returns the discovered URLs in discovery order. Page text that Exa
+        returns alongside a search or subpage crawl is kept in
+        ``self._content_cache`` so the scrape phase can skip fetching it.
+        """
         logger.info("Discovering Aven support pages using Exa.ai neural search...")
         
-        discovered_urls = set()
+        exa = self._get_exa()
+        
+        discovered_urls: Dict[str, None] = {}
         
-        # Multiple search strategies to comprehensively discover content
+        # Multiple search strategies to comprehensively discover content,
+        # highest-yield first since discovery stops once max_subpages is reached
         search_queries = [
             # Direct URL-based discovery
             config.base_url,
@@ -111,13 +343,13 @@ class AvenScraper:
         
         for query in tqdm(search_queries, desc="Discovering pages"):
             try:
-                logger.debug(f"Searching with query: {query}")
+                logger.debug("Searching with query: %s", query)
                 
                 # Use Exa's subpage crawling for comprehensive discovery
                 if query == config.base_url:
                     # Direct URL crawling with subpages
-                    response = self._rate_limited_request(
-                        self.exa.get_contents,
+                    response = await self._rate_limited_request(
+                        exa.get_contents,
                         [query],
                         subpages=config.max_subpages,
                         subpage_target=config.target_content,
@@ -129,8 +361,8 @@ class AvenScraper:
                     )
                 else:
                     # Neural search for content discovery
-                    response = self._rate_limited_request(
-                        self.exa.search_and_contents,
+                    response = await self._rate_limited_request(
+                        exa.search_and_contents,
                         query,
                         type=config.search_type,
                         use_autoprompt=config.use_autoprompt,
@@ -148,85 +380,84 @@ class AvenScraper:
                     for result in response.results:
                         url = result.url
                         if self._is_valid_support_url(url):
-                            discovered_urls.add(url)
-                            logger.debug(f"Discovered: {url}")
+                            discovered_urls[url] = None
+                            self._cache_content(result)
+                            logger.debug("Discovered: %s", url)
                             
                             # Also check subpages if available
                             if hasattr(result, 'subpages') and result.subpages:
                                 for subpage in result.subpages:
+                                    # exa_py passes subpages through as raw API objects
+                                    if isinstance(subpage, dict):
+                                        subpage = ExaContent.from_json(subpage)
                                     if self._is_valid_support_url(subpage.url):
-                                        discovered_urls.add(subpage.url)
-                                        logger.debug(f"Discovered subpage: {subpage.url}")
-                
-                # Small delay between searches
-                time.sleep(1)
+                                        discovered_urls[subpage.url] = None
+                                        self._cache_content(subpage)
+                                        logger.debug("Discovered subpage: %s", subpage.url)
                 
             except Exception as e:
                 logger.warning(f"Failed to search with query '{query}': {e}")
                 continue
+            
+            # Skip the remaining queries once enough pages have been found
+            if len(discovered_urls) >= config.max_subpages:
+                logger.info(f"Reached {config.max_subpages} URLs, skipping remaining search queries")
+                break
         
-        discovered_list = list(discovered_urls)
-        self.session_stats['urls_discovered'] = len(discovered_list)
-        logger.info(f"Discovered {len(discovered_list)} unique support URLs")
+        self.session_stats['urls_discovered'] = len(discovered_urls)
+        logger.info(f"Discovered {len(discovered_urls)} unique support URLs")
         
-        return discovered_list
+        return list(discovered_urls)
     
     def _is_valid_support_url(self, url: str) -> bool:
-        """Check if URL is a valid Aven support page"""
-        if not url or url in self.scraped_urls:
+        """
+        Check if URL is a valid Aven support page.
+        
+        Already-scraped URLs are skipped where pages are scraped, not here, so
+        the verdict depends on the URL alone and can be cached.
+        """
+        if not url:
             return False
         
+        # The same URLs come back from many queries; filter each one only once
+        valid = self._url_filter_cache.get(url)
+        if valid is None:
+            valid = self._url_filter_cache[url] = self._matches_url_filters(url)
+        return valid
+    
+    def _matches_url_filters(self, url: str) -> bool:
+        """Apply the configured domain, path and extension filters to a URL"""
         parsed = urlparse(url)
-        domain = parsed.netloc.lower()
+        domain = parsed.hostname or ''
         path = parsed.path.lower()
         
-        # Must be Aven domain
-        if not any(allowed_domain in domain for allowed_domain in config.include_domains):
+        # Must be Aven domain (or a subdomain of one)
+        if not domain.endswith(self._include_domains):
             return False
         
         # Must be support-related or whitelisted
-        if 'support' not in path and not any(pattern in path for pattern in config.target_content):
+        if 'support' not in path and not self._target_re.search(path):
             # Check if it's the main support page
             if url != config.base_url:
                 return False
         
         # Exclude unwanted paths
-        if any(pattern in path for pattern in config.exclude_patterns):
+        if self._exclude_re.search(path):
             return False
         
         # Exclude non-content URLs
-        excluded_extensions = ['.pdf', '.jpg', '.jpeg', '.png', '.gif', '.css', '.js']
-        if any(path.endswith(ext) for ext in excluded_extensions):
+        if path.endswith(EXCLUDED_EXTENSIONS):
             return False
         
         return True
     
-    def scrape_page_content(self, url: str) -> Optional[Dict[str, Any]]:
-        """Scrape content from a single page using Exa.ai"""
+    def _process_page(self, url: str, result: Any) -> Optional[Dict[str, Any]]:
+        """Process an Exa.ai result for a single page into chunks and track stats"""
         if url in self.scraped_urls:
-            logger.debug(f"Already scraped: {url}")
+            logger.debug("Already scraped: %s", url)
             return None
         
         try:
-            logger.debug(f"Scraping content from: {url}")
-            
-            # Get page content using Exa.ai
-            response = self._rate_limited_request(
-                self.exa.get_contents,
-                [url],
-                text=True,
-                highlights={
-                    "num_sentences": config.num_sentences_per_highlight,
-                    "highlights_per_url": config.highlights_per_url
-                }
-            )
-            
-            if not response.results:
-                logger.warning(f"No content retrieved for {url}")
-                return None
-            
-            result = response.results[0]
-            
             # Process the content
             processed = self.content_processor.process_content(result.text or "", url)
             
@@ -246,8 +477,7 @@ class AvenScraper:
             
             # Track content type
             content_type = processed['metadata']['content_type']
-            self.session_stats['content_types'][content_type] = \
-                self.session_stats['content_types'].get(content_type, 0) + 1
+            self.session_stats['content_types'][content_type] += 1
             
             self.scraped_urls.add(url)
             self.session_stats['urls_scraped'] += 1
@@ -264,10 +494,80 @@ class AvenScraper:
             self.session_stats['urls_failed'] += 1
             return None
     
+    def _record_page(self, processed: Dict[str, Any]):
+        """Stream a processed page and its chunks to disk and keep only its chunks and summary row"""
+        if self._raw_pages_file is not None:
+            self._raw_pages_file.write(orjson.dumps(processed, default=str, option=orjson.OPT_APPEND_NEWLINE))
+            self._raw_pages_file.flush()
+        if self._chunks_file is not None:
+            self._chunks_file.writelines(
+                orjson.dumps(self._chunk_to_dict(chunk), default=str, option=orjson.OPT_APPEND_NEWLINE)
+                for chunk in processed['chunks']
+            )
+            self._chunks_file.flush()
+        
+        metadata = processed['metadata']
+        self.page_summaries.append({
+            'url': metadata['url'],
+            'title': metadata['title'],
+            'content_type': metadata['content_type'],
+            'word_count': processed['total_words'],
+            'chunk_count': processed['total_chunks'],
+            'scraped_at': metadata['scraped_at']
+        })
+        self.all_chunks.extend(processed['chunks'])
+        self.session_stats['total_chunks'] += processed['total_chunks']
+    
+    async def scrape_page_batch(self, urls: List[str], sem: asyncio.Semaphore) -> int:
+        """
+        Scrape a batch of pages with a single Exa.ai get_contents call.
+        
+        The request is gated by the shared semaphore; each returned page is
+        then processed and recorded individually. Returns the number of pages
+        recorded.
+        """
+        urls = [url for url in urls if url not in self.scraped_urls]
+        if not urls:
+            return 0
+        
+        try:
+            logger.debug("Scraping content from %d pages: %s", len(urls), urls)
+            
+            # Get page content using Exa.ai
+            async with sem:
+                results = await self._rate_limited_request(self._get_contents, urls)
+        except Exception as e:
+            logger.error(f"Failed to scrape batch of {len(urls)} pages: {e}")
+            self.failed_urls.update(urls)
+            self.session_stats['urls_failed'] += len(urls)
+            return 0
+        
+        if self._contents_cache is not None:
+            self._contents_cache.put_many(results)
+        
+        # Results are matched to the URLs we asked for, not the (possibly
+        # normalized or redirected) URL Exa reports back
+        returned_urls = {result.requested_url for result in results}
+        for url in urls:
+            if url not in returned_urls:
+                logger.warning(f"No content retrieved for {url}")
+        
+        recorded = 0
+        for result in results:
+            processed = self._process_page(result.requested_url, result)
+            if processed:
+                self._record_page(processed)
+                recorded += 1
+        
+        return recorded
+    
     def scrape_support_pages(self) -> Dict[str, Any]:
-        """Main method to scrape all Aven support pages"""
+        """Main method to scrape all Aven support pages (synchronous wrapper)"""
+        return asyncio.run(self.ascrape_support_pages())
+    
+    async def ascrape_support_pages(self) -> Dict[str, Any]:
+        """Scrape all Aven support pages, fetching page content concurrently"""
         logger.info("Starting Aven support page scraping...")
-        setup_logging()
         
         try:
             validate_config()
@@ -278,25 +578,62 @@ class AvenScraper:
         # Create output directories
         output_paths = get_output_paths()
         
+        if config.content_cache_ttl_seconds > 0:
+            self._contents_cache = ContentCache(output_paths['content_cache'], config.content_cache_ttl_seconds)
+        
         try:
             # Discover support pages
-            discovered_urls = self.discover_support_pages()
+            discovered_urls = await self.discover_support_pages()
             
             if not discovered_urls:
                 logger.warning("No support pages discovered")
                 return {'success': False, 'error': 'No pages discovered'}
             
+            # Processed pages and their chunks are appended to NDJSON .part files
+            # as they complete; a failed scrape keeps everything finished so far
+            # there and leaves the previous run's files untouched
+            self._open_stream_files(output_paths)
+            
             # Limit URLs based on configuration
             urls_to_scrape = discovered_urls[:config.max_subpages]
             logger.info(f"Scraping {len(urls_to_scrape)} pages...")
             
-            # Scrape each page
-            for url in tqdm(urls_to_scrape, desc="Scraping pages"):
-                result = self.scrape_page_content(url)
-                if result:
-                    self.all_results.append(result)
-                    self.all_chunks.extend(result['chunks'])
-                    self.session_stats['total_chunks'] += result['total_chunks']
+            # Pages whose text arrived during discovery need no further API call
+            urls_to_fetch = []
+            for url in urls_to_scrape:
+                cached = self._content_cache.pop(url, None)
+                if cached is None:
+                    urls_to_fetch.append(url)
+                    continue
+                logger.debug("Using content returned during discovery for: %s", url)
+                processed = self._process_page(url, cached)
+                if processed:
+                    self._record_page(processed)
+            
+            # Pages fetched by a recent run are served from the on-disk cache
+            if self._contents_cache is not None:
+                stored = self._contents_cache.get_many(urls_to_fetch)
+                if stored:
+                    logger.info(f"Using cached content for {len(stored)} pages")
+                urls_to_fetch = [url for url in urls_to_fetch if url not in stored]
+                for url, content in stored.items():
+                    processed = self._process_page(url, content)
+                    if processed:
+                        self._record_page(processed)
+            
+            # Fetch the remaining pages in batches, concurrently, bounded by the semaphore
+            sem = asyncio.Semaphore(self._max_in_flight())
+            batches = list(_batched(urls_to_fetch, config.contents_batch_size))
+            tasks = [self.scrape_page_batch(batch, sem) for batch in batches]
+            batch_results = await atqdm.gather(
+                *map(_return_exceptions, tasks), desc="Scraping pages", unit="batch"
+            )
+            
+            for batch, outcome in zip(batches, batch_results):
+                if isinstance(outcome, BaseException):
+                    logger.error(f"Failed to scrape batch of {len(batch)} pages: {outcome}")
+                    self.failed_urls.update(batch)
+                    self.session_stats['urls_failed'] += len(batch)
             
             # Compile final results
             session_end = datetime.now()
@@ -310,13 +647,14 @@ class AvenScraper:
                 'scraped_urls': list(self.scraped_urls),
                 'failed_urls': list(self.failed_urls),
                 'discovered_urls': discovered_urls,
-                'processed_pages': self.all_results,
+                'page_summaries': self.page_summaries,
                 'total_chunks': len(self.all_chunks),
                 'chunks': [self._chunk_to_dict(chunk) for chunk in self.all_chunks]
             }
             
             # Save results
             self._save_results(final_results, output_paths)
+            self._close_stream_files(output_paths)
             
             logger.info(f"Scraping completed successfully!")
             logger.info(f"- Pages scraped: {self.session_stats['urls_scraped']}")
@@ -329,30 +667,41 @@ class AvenScraper:
         except Exception as e:
             logger.error(f"Scraping failed: {e}")
             return {'success': False, 'error': str(e)}
+        
+        finally:
+            self._close_stream_files()
+            if self._contents_cache is not None:
+                self._contents_cache.close()
+                self._contents_cache = None
+            await self._close_session()
+            await self._close_exa()
+    
+    def _open_stream_files(self, output_paths: Dict[str, str]):
+        """Open the .part files that processed pages and chunks are streamed to"""
+        self._raw_pages_file = open(f"{output_paths['raw_pages']}.part", 'wb')
+        self._chunks_file = open(f"{output_paths['chunks_jsonl']}.part", 'wb')
+    
+    def _close_stream_files(self, output_paths: Optional[Dict[str, str]] = None):
+        """Close any open stream files, moving them into place when output_paths is given"""
+        for attr, key in (('_raw_pages_file', 'raw_pages'), ('_chunks_file', 'chunks_jsonl')):
+            stream = getattr(self, attr)
+            if stream is None:
+                continue
+            stream.close()
+            setattr(self, attr, None)
+            if output_paths is not None:
+                os.replace(stream.name, output_paths[key])
     
     def _chunk_to_dict(self, chunk: TextChunk) -> Dict[str, Any]:
         """Convert TextChunk to dictionary for serialization"""
-        return {
-            'content': chunk.content,
-            'chunk_id': chunk.chunk_id,
-            'source_url': chunk.source_url,
-            'title': chunk.title,
-            'chunk_index': chunk.chunk_index,
-            'total_chunks': chunk.total_chunks,
-            'word_count': chunk.word_count,
-            'char_count': chunk.char_count,
-            'section_title': chunk.section_title,
-            'content_type': chunk.content_type,
-            'keywords': chunk.keywords
-        }
+        return dict(zip(CHUNK_FIELDS, _get_chunk_fields(chunk)))
     
     def _save_results(self, results: Dict[str, Any], output_paths: Dict[str, str]):
         """Save scraping results in multiple formats"""
         logger.info("Saving results...")
         
         # Save raw JSON data
-        with open(output_paths['raw_data'], 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False, default=str)
+        _write_json(output_paths['raw_data'], results)
         
         # Save processed chunks
         chunks_data = {
@@ -363,36 +712,20 @@ class AvenScraper:
                 'session_stats': results['session_stats']
             }
         }
-        with open(output_paths['processed_data'], 'w', encoding='utf-8') as f:
-            json.dump(chunks_data, f, indent=2, ensure_ascii=False, default=str)
+        _write_json(output_paths['processed_data'], chunks_data)
         
         # Save summary CSV
-        summary_data = []
-        for page in results['processed_pages']:
-            if page['success']:
-                summary_data.append({
-                    'url': page['metadata']['url'],
-                    'title': page['metadata']['title'],
-                    'content_type': page['metadata']['content_type'],
-                    'word_count': page['total_words'],
-                    'chunk_count': page['total_chunks'],
-                    'scraped_at': page['metadata']['scraped_at']
-                })
-        
-        pd.DataFrame(summary_data).to_csv(output_paths['summary_csv'], index=False)
+        with open(output_paths['summary_csv'], 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_CSV_FIELDS)
+            writer.writeheader()
+            writer.writerows(results['page_summaries'])
         
         # Save individual chunk files
-        for i, chunk in enumerate(results['chunks'], 1):
-            chunk_file = os.path.join(output_paths['chunks_dir'], f"chunk_{i:04d}.md")
-            with open(chunk_file, 'w', encoding='utf-8') as f:
-                f.write(f"# {chunk['title']}\n\n")
-                f.write(f"**Source:** {chunk['source_url']}\n")
-                f.write(f"**Type:** {chunk['content_type']}\n")
-                if chunk['section_title']:
-                    f.write(f"**Section:** {chunk['section_title']}\n")
-                f.write(f"**Chunk:** {chunk['chunk_index']}/{chunk['total_chunks']}\n\n")
-                f.write("---\n\n")
-                f.write(chunk['content'])
+        chunks_dir = Path(output_paths['chunks_dir'])
+        chunk_paths = [chunks_dir / f"chunk_{i:04d}.md" for i in range(1, len(results['chunks']) + 1)]
+        chunk_texts = [_render_chunk_markdown(chunk) for chunk in results['chunks']]
+        with ThreadPoolExecutor(max_workers=CHUNK_WRITE_WORKERS) as executor:
+            list(executor.map(_write_text, chunk_paths, chunk_texts))
         
         # Save metadata
         metadata = {
@@ -405,8 +738,7 @@ class AvenScraper:
             'session_stats': results['session_stats'],
             'output_files': output_paths
         }
-        with open(output_paths['metadata'], 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2, default=str)
+        _write_json(output_paths['metadata'], metadata)
         
         logger.info(f"Results saved to {config.output_dir}/")
 
@@ -430,6 +762,8 @@ def main():
     if args.verbose:
         config.log_level = "DEBUG"
     
+    setup_logging()
+    
     # Run scraper
     scraper = AvenScraper(api_key=args.api_key)
     results = scraper.scrape_support_pages()
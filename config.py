@@ -28,11 +28,17 @@ class ScrapingConfig(BaseSettings):
     requests_per_minute: int = Field(default=30, env="REQUESTS_PER_MINUTE")
     max_retries: int = Field(default=3, env="MAX_RETRIES")
     timeout_seconds: int = Field(default=30, env="TIMEOUT_SECONDS")
+    avg_latency_seconds: float = Field(default=3.0, env="AVG_LATENCY_SECONDS")
+    contents_batch_size: int = Field(default=10, env="CONTENTS_BATCH_SIZE")
+    content_cache_ttl_seconds: int = Field(default=86400, env="CONTENT_CACHE_TTL_SECONDS")  # 0 disables
     
     # Content Processing
     chunk_size: int = Field(default=1000, env="CHUNK_SIZE")
     overlap_size: int = Field(default=100, env="OVERLAP_SIZE")
     min_chunk_size: int = Field(default=100, env="MIN_CHUNK_SIZE")
+    # Use html2text_rs for HTML-to-markdown; faster, but its markdown differs
+    # (reference-style links, image alt text kept), which changes the chunks
+    fast_markdown: bool = Field(default=False, env="FAST_MARKDOWN")
     
     # Target Content Types
     target_content: List[str] = Field(default=[
@@ -69,14 +75,17 @@ config = ScrapingConfig()
 def get_output_paths():
     """Get all output file paths"""
     base_dir = config.output_dir
-    os.makedirs(base_dir, exist_ok=True)
+    # Creating the chunks directory also creates base_dir
     os.makedirs(f"{base_dir}/content_chunks", exist_ok=True)
     
     return {
         "raw_data": f"{base_dir}/aven_support_raw.json",
+        "raw_pages": f"{base_dir}/aven_support_raw.jsonl",
         "processed_data": f"{base_dir}/aven_support_processed.json",
+        "chunks_jsonl": f"{base_dir}/aven_support_chunks.jsonl",
         "summary_csv": f"{base_dir}/aven_support_summary.csv",
         "chunks_dir": f"{base_dir}/content_chunks",
+        "content_cache": f"{base_dir}/.content_cache.sqlite",
         "metadata": f"{base_dir}/scraping_metadata.json",
         "logs": f"{base_dir}/scraping.log"
     }
@@ -1,18 +1,122 @@
 """
 Content processing module for converting HTML to clean text chunks
 """
+import operator
 import re
+import sys
+import threading
+from bisect import bisect_right
+from itertools import accumulate
 import html2text
-from typing import List, Dict, Any, Optional
-from bs4 import BeautifulSoup, Tag
+from typing import List, Dict, Any, Optional, Tuple
+from selectolax.lexbor import LexborHTMLParser
 from markdownify import markdownify
 from dataclasses import dataclass
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin, urlparse, urlsplit, urlunparse
 import logging
 
+try:
+    # Optional Rust converter, used in place of html2text only when fast_markdown
+    # is enabled: it emits reference-style links and keeps image alt text, so
+    # its markdown (and therefore chunking) differs from the configured html2text
+    import html2text_rs
+except ImportError:
+    html2text_rs = None
+
+try:
+    # Optional Aho-Corasick matcher for section titles on heading-heavy pages
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Elements that never contain support content
+UNWANTED_TAGS = ['script', 'style', 'nav', 'footer', 'aside', 'header']
+
+# Class/id fragments of common navigation/UI elements, matched in one pass
+_UNWANTED_RE = re.compile(
+    'nav|menu|sidebar|footer|header|advertisement|social|share|cookie|popup|modal|breadcrumb',
+    re.I
+)
+
+# Text normalisation patterns used by _clean_text
+_MULTI_NEWLINE_RE = re.compile(r'\n\s*\n\s*\n')
+_SPACE_RUN_RE = re.compile(r'  +')  # Literal prefix lets the engine skip ahead quickly
+_EMPTY_BOLD_RE = re.compile(r'\*\*\s*\*\*')
+_EMPTY_UNDERLINE_RE = re.compile(r'__\s*__')
+_EMPTY_LINK_RE = re.compile(r'\[\s*\]\(\s*\)')
+_EMPTY_LIST_ITEM_RE = re.compile(r'\n\s*[-\*\+]\s*\n')
+_HEADER_RULE_RE = re.compile(r'\n[-=]{4,}\n')
+
+# Printable ASCII that urljoin passes through untouched in a URL
+_PLAIN_URL_CHAR = r'[^\x00-\x20\x7f-\U0010ffff?#;\[\]\\]'
+
+# A path segment urljoin keeps verbatim: non-empty, not '.' or '..', no ':'
+_PLAIN_SEGMENT = rf'(?!\.\.?(?:/|\Z))(?:(?![/:]){_PLAIN_URL_CHAR})+'
+
+# hrefs whose urljoin result can be built without calling it
+_ABSOLUTE_HREF_RE = re.compile(rf'https?://((?:(?!/){_PLAIN_URL_CHAR})+)(?:/{_PLAIN_URL_CHAR}*)?')
+_RELATIVE_HREF_RE = re.compile(rf'{_PLAIN_SEGMENT}(?:/{_PLAIN_SEGMENT})*/?')
+_ROOT_RELATIVE_HREF_RE = re.compile(rf'/(?:{_PLAIN_SEGMENT}(?:/{_PLAIN_SEGMENT})*/?)?')
+_FRAGMENT_HREF_RE = re.compile(rf'#{_PLAIN_URL_CHAR}*')
+
+# Link schemes that never carry a host
+NON_NAVIGABLE_HREF_PREFIXES = ('mailto:', 'javascript:', 'tel:')
+
+class _LinkResolver:
+    """Resolves hrefs exactly like urljoin(page_url, href), skipping urllib for plain hrefs"""
+    
+    def __init__(self, page_url: str):
+        parts = urlsplit(page_url)
+        self.page_url = page_url
+        self.domain = parts.netloc
+        self.root = None
+        self.directory = None
+        self.document = None
+        if parts.scheme in ('http', 'https') and parts.netloc:
+            self.root = f"{parts.scheme}://{parts.netloc}"
+            self.document = urlunparse(urlparse(page_url)._replace(fragment=''))
+            if not parts.path or _ROOT_RELATIVE_HREF_RE.fullmatch(parts.path):
+                self.directory = self.root + (parts.path[:parts.path.rfind('/') + 1] or '/')
+    
+    def resolve(self, href: str) -> Tuple[str, str]:
+        """Return the absolute URL for href and its netloc"""
+        # Absolute http(s) URLs come back from urljoin unchanged
+        match = _ABSOLUTE_HREF_RE.fullmatch(href)
+        if match:
+            return href, match.group(1)
+        
+        # Plain root-relative and relative paths need no dot-segment resolution,
+        # and in-page anchors only swap the page's fragment
+        if self.root:
+            if _FRAGMENT_HREF_RE.fullmatch(href):
+                return (self.document + href if href != '#' else self.document), self.domain
+            if _ROOT_RELATIVE_HREF_RE.fullmatch(href):
+                return self.root + href, self.domain
+            if self.directory and _RELATIVE_HREF_RE.fullmatch(href):
+                return self.directory + href, self.domain
+        
+        absolute_url = urljoin(self.page_url, href)
+        return absolute_url, urlsplit(absolute_url).netloc
+
+# Content-type patterns in precedence order: the first category that matches wins
+URL_TYPE_PATTERNS = (
+    ('faq', ('faq', 'frequently-asked')),
+    ('guide', ('guide', 'tutorial', 'how-to')),
+    ('troubleshooting', ('troubleshoot', 'problem', 'fix')),
+    ('getting_started', ('getting-started', 'setup', 'install')),
+    ('documentation', ('api', 'reference', 'documentation'))
+)
+CONTENT_TYPE_PATTERNS = (
+    ('guide', ('step 1', 'first step', 'getting started')),
+    ('troubleshooting', ('error', 'troubleshoot', 'problem', 'issue'))
+)
+
+# TextChunk is allocated per chunk, so drop the per-instance __dict__ where supported
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_DATACLASS_SLOTS)
 class TextChunk:
     """Represents a processed text chunk with metadata"""
     content: str
@@ -34,23 +138,41 @@ class TextChunk:
 class ContentProcessor:
     """Processes HTML content into clean, structured text chunks"""
     
-    def __init__(self, chunk_size: int = 1000, overlap_size: int = 100, min_chunk_size: int = 100):
+    def __init__(self, chunk_size: int = 1000, overlap_size: int = 100, min_chunk_size: int = 100,
+                 fast_markdown: bool = False):
         self.chunk_size = chunk_size
         self.overlap_size = overlap_size
         self.min_chunk_size = min_chunk_size
         
-        # Configure html2text
-        self.h2t = html2text.HTML2Text()
-        self.h2t.ignore_links = False
-        self.h2t.ignore_images = True
-        self.h2t.ignore_emphasis = False
-        self.h2t.body_width = 0  # No line wrapping
-        self.h2t.single_line_break = True
+        # Opt-in Rust HTML-to-markdown conversion (output differs from html2text)
+        if fast_markdown and html2text_rs is None:
+            logger.warning("fast_markdown requested but html2text_rs is not installed; using html2text")
+        self.fast_markdown = fast_markdown and html2text_rs is not None
         
+        # HTML2Text keeps parser state between calls, so each thread gets its own
+        self._local = threading.local()
+    
+    @property
+    def h2t(self) -> html2text.HTML2Text:
+        """This thread's html2text converter, created and configured on first use"""
+        h2t = getattr(self._local, 'h2t', None)
+        if h2t is None:
+            # Configure html2text
+            h2t = html2text.HTML2Text()
+            h2t.ignore_links = False
+            h2t.ignore_images = True
+            h2t.ignore_emphasis = False
+            h2t.body_width = 0  # No line wrapping
+            h2t.single_line_break = True
+            self._local.h2t = h2t
+        return h2t
+    
     def extract_metadata(self, html_content: str, url: str) -> Dict[str, Any]:
         """Extract metadata from HTML content"""
-        soup = BeautifulSoup(html_content, 'lxml')
-        
+        return self._extract_metadata(LexborHTMLParser(html_content), html_content, url)
+    
+    def _extract_metadata(self, tree: LexborHTMLParser, html_content: str, url: str) -> Dict[str, Any]:
+        """Extract metadata from an already parsed HTML tree"""
         metadata = {
             'url': url,
             'title': '',
@@ -64,138 +186,141 @@ class ContentProcessor:
             'language': 'en'  # Default, could be detected
         }
         
-        # Extract title
-        title_tag = soup.find('title')
-        if title_tag:
-            metadata['title'] = title_tag.get_text().strip()
+        # Title and meta tags live in <head>, so only that subtree is searched
+        head = tree.head
+        if head is not None:
+            # Extract title
+            title_tag = head.css_first('title')
+            if title_tag:
+                metadata['title'] = title_tag.text().strip()
+            
+            # Extract meta description
+            desc_tag = head.css_first('meta[name="description"]')
+            if desc_tag and desc_tag.attributes.get('content'):
+                metadata['description'] = desc_tag.attributes['content'].strip()
+            
+            # Extract meta keywords
+            keywords_tag = head.css_first('meta[name="keywords"]')
+            if keywords_tag and keywords_tag.attributes.get('content'):
+                metadata['keywords'] = [k.strip() for k in keywords_tag.attributes['content'].split(',')]
         
-        # Try alternative title sources
-        if not metadata['title']:
-            h1_tag = soup.find('h1')
-            if h1_tag:
-                metadata['title'] = h1_tag.get_text().strip()
-        
-        # Extract meta description
-        desc_tag = soup.find('meta', attrs={'name': 'description'})
-        if desc_tag and desc_tag.get('content'):
-            metadata['description'] = desc_tag['content'].strip()
-        
-        # Extract meta keywords
-        keywords_tag = soup.find('meta', attrs={'name': 'keywords'})
-        if keywords_tag and keywords_tag.get('content'):
-            metadata['keywords'] = [k.strip() for k in keywords_tag['content'].split(',')]
-        
-        # Extract headings
+        # Extract headings and internal links in a single walk of the document
+        link_resolver = _LinkResolver(url)
+        base_domain = link_resolver.domain
         headings = []
-        for level in range(1, 7):
-            for heading in soup.find_all(f'h{level}'):
+        links = []
+        for node in tree.css('h1, h2, h3, h4, h5, h6, a[href]'):
+            if node.tag != 'a':
                 headings.append({
-                    'level': level,
-                    'text': heading.get_text().strip(),
-                    'id': heading.get('id', '')
+                    'level': int(node.tag[1]),
+                    'text': node.text().strip(),
+                    'id': node.attributes.get('id') or ''
                 })
-        metadata['headings'] = headings
-        
-        # Extract internal links
-        base_domain = urlparse(url).netloc
-        links = []
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            absolute_url = urljoin(url, href)
-            link_domain = urlparse(absolute_url).netloc
+                continue
+            
+            href = node.attributes['href'] or ''
+            if base_domain and href.startswith(NON_NAVIGABLE_HREF_PREFIXES):
+                continue
+            absolute_url, link_domain = link_resolver.resolve(href)
             
             if base_domain in link_domain or 'aven.com' in link_domain:
                 links.append({
                     'url': absolute_url,
-                    'text': link.get_text().strip(),
-                    'title': link.get('title', '')
+                    'text': node.text().strip(),
+                    'title': node.attributes.get('title') or ''
                 })
+        
+        # Group headings by level, keeping document order within a level
+        headings.sort(key=operator.itemgetter('level'))
+        metadata['headings'] = headings
         metadata['links'] = links
         
+        # Try alternative title sources
+        if not metadata['title'] and headings and headings[0]['level'] == 1:
+            metadata['title'] = headings[0]['text']
+        
         return metadata
     
     def _detect_content_type(self, html_content: str, url: str) -> str:
         """Detect the type of content based on HTML and URL patterns"""
-        html_lower = html_content.lower()
         url_lower = url.lower()
         
         # Check URL patterns
-        if any(pattern in url_lower for pattern in ['faq', 'frequently-asked']):
-            return 'faq'
-        elif any(pattern in url_lower for pattern in ['guide', 'tutorial', 'how-to']):
-            return 'guide'
-        elif any(pattern in url_lower for pattern in ['troubleshoot', 'problem', 'fix']):
-            return 'troubleshooting'
-        elif any(pattern in url_lower for pattern in ['getting-started', 'setup', 'install']):
-            return 'getting_started'
-        elif any(pattern in url_lower for pattern in ['api', 'reference', 'documentation']):
-            return 'documentation'
-        
-        # Check content patterns
+        for content_type, patterns in URL_TYPE_PATTERNS:
+            if any(pattern in url_lower for pattern in patterns):
+                return content_type
+        
+        # Check content patterns; the page is only lowercased when the URL is inconclusive
+        html_lower = html_content.lower()
         if 'frequently asked questions' in html_lower or html_lower.count('q:') > 3:
             return 'faq'
-        elif any(phrase in html_lower for phrase in ['step 1', 'first step', 'getting started']):
-            return 'guide'
-        elif any(phrase in html_lower for phrase in ['error', 'troubleshoot', 'problem', 'issue']):
-            return 'troubleshooting'
+        for content_type, phrases in CONTENT_TYPE_PATTERNS:
+            if any(phrase in html_lower for phrase in phrases):
+                return content_type
         
         return 'support_article'
     
     def clean_html(self, html_content: str) -> str:
         """Clean and convert HTML to markdown/text"""
-        soup = BeautifulSoup(html_content, 'lxml')
-        
+        return self._clean_tree(LexborHTMLParser(html_content))
+    
+    def _clean_tree(self, tree: LexborHTMLParser) -> str:
+        """Clean a parsed HTML tree in place and convert it to markdown/text"""
         # Remove unwanted elements
-        for element in soup(['script', 'style', 'nav', 'footer', 'aside', 'header']):
-            element.decompose()
+        tree.strip_tags(UNWANTED_TAGS)
         
-        # Remove elements with certain classes/ids (common navigation/UI elements)
-        unwanted_patterns = [
-            'nav', 'menu', 'sidebar', 'footer', 'header', 'advertisement',
-            'social', 'share', 'cookie', 'popup', 'modal', 'breadcrumb'
-        ]
-        
-        for pattern in unwanted_patterns:
-            for element in soup.find_all(attrs={'class': re.compile(pattern, re.I)}):
-                element.decompose()
-            for element in soup.find_all(attrs={'id': re.compile(pattern, re.I)}):
+        # Remove elements with certain classes/ids (common navigation/UI elements).
+        # Innermost matches go first so no node is decomposed after its ancestor;
+        # the <html> root is kept so a page-level class cannot empty the document.
+        for element in reversed(tree.css('[class], [id]')):
+            attributes = element.attributes
+            if element.tag != 'html' and (
+                    _UNWANTED_RE.search(attributes.get('class') or '') or
+                    _UNWANTED_RE.search(attributes.get('id') or '')):
                 element.decompose()
         
         # Convert to clean text
         try:
             # First try html2text for better markdown conversion
-            clean_text = self.h2t.handle(str(soup))
+            clean_text = self._html_to_markdown(tree.html)
         except Exception as e:
-            logger.warning(f"html2text failed, falling back to BeautifulSoup: {e}")
-            clean_text = soup.get_text()
+            logger.warning(f"html2text failed, falling back to plain text: {e}")
+            clean_text = tree.text()
         
         # Clean up the text
         clean_text = self._clean_text(clean_text)
         
         return clean_text
     
+    def _html_to_markdown(self, html: str) -> str:
+        """Convert HTML to markdown, using the Rust converter only when fast_markdown is enabled"""
+        if self.fast_markdown:
+            return html2text_rs.text_markdown(html, width=sys.maxsize)  # No line wrapping
+        return self.h2t.handle(html)
+    
     def _clean_text(self, text: str) -> str:
         """Clean and normalize text content"""
         # Remove excessive whitespace
-        text = re.sub(r'\n\s*\n\s*\n', '\n\n', text)  # Multiple newlines to double
-        text = re.sub(r'[ \t]+', ' ', text)  # Multiple spaces to single
-        text = re.sub(r'\n[ \t]+', '\n', text)  # Leading whitespace on lines
+        text = _MULTI_NEWLINE_RE.sub('\n\n', text)  # Multiple newlines to double
+        text = _SPACE_RUN_RE.sub(' ', text.replace('\t', ' '))  # Multiple spaces to single
+        text = text.replace('\n ', '\n')  # Leading whitespace on lines (now at most one space)
         
         # Remove empty markdown elements
-        text = re.sub(r'\*\*\s*\*\*', '', text)  # Empty bold
-        text = re.sub(r'__\s*__', '', text)  # Empty underline
-        text = re.sub(r'\[\s*\]\(\s*\)', '', text)  # Empty links
+        text = _EMPTY_BOLD_RE.sub('', text)  # Empty bold
+        text = _EMPTY_UNDERLINE_RE.sub('', text)  # Empty underline
+        text = _EMPTY_LINK_RE.sub('', text)  # Empty links
         
         # Clean up lists
-        text = re.sub(r'\n\s*[-\*\+]\s*\n', '\n', text)  # Empty list items
+        text = _EMPTY_LIST_ITEM_RE.sub('\n', text)  # Empty list items
         
         # Remove excessive dashes or equals (from markdown headers)
-        text = re.sub(r'\n[-=]{4,}\n', '\n', text)
+        text = _HEADER_RULE_RE.sub('\n', text)
         
         return text.strip()
     
-    def create_chunks(self, content: str, metadata: Dict[str, Any]) -> List[TextChunk]:
-        """Split content into overlapping chunks with metadata"""
+    def create_chunks(self, content: str, metadata: Dict[str, Any],
+                      word_count: Optional[int] = None) -> List[TextChunk]:
+        """Split content into overlapping chunks with metadata (word_count of content may be passed if already known)"""
         if len(content) <= self.chunk_size:
             # Content fits in one chunk
             return [TextChunk(
@@ -205,7 +330,7 @@ class ContentProcessor:
                 title=metadata['title'],
                 chunk_index=1,
                 total_chunks=1,
-                word_count=len(content.split()),
+                word_count=len(content.split()) if word_count is None else word_count,
                 char_count=len(content),
                 content_type=metadata['content_type'],
                 keywords=metadata['keywords']
@@ -214,11 +339,18 @@ class ContentProcessor:
         chunks = []
         words = content.split()
         total_words = len(words)
+        heading_matcher = self._build_heading_matcher(metadata['headings'])
+        
+        # offsets[i] - offsets[j] - 1 is the length of ' '.join(words[j:i])
+        offsets = list(accumulate((len(word) + 1 for word in words), initial=0))
         
         # Calculate approximate chunks needed
         words_per_chunk = self.chunk_size // 5  # Rough estimate: 5 chars per word
         overlap_words = self.overlap_size // 5
         
+        # Each window starts a fixed stride after the previous one (at least one word)
+        stride = max(words_per_chunk - overlap_words, 1)
+        
         start_idx = 0
         chunk_num = 1
         
@@ -226,23 +358,29 @@ class ContentProcessor:
             # Calculate end index
             end_idx = min(start_idx + words_per_chunk, total_words)
             
-            # Get chunk content
-            chunk_words = words[start_idx:end_idx]
-            chunk_content = ' '.join(chunk_words)
+            # Shrink to the longest run of words (at least one) that fits chunk_size
+            fit_idx = end_idx
+            if end_idx - start_idx > 1:
+                fit_idx = bisect_right(
+                    offsets, offsets[start_idx] + self.chunk_size + 1, start_idx + 2, end_idx + 1
+                ) - 1
             
-            # Adjust chunk size if too large
-            while len(chunk_content) > self.chunk_size and len(chunk_words) > 1:
-                chunk_words = chunk_words[:-1]
-                chunk_content = ' '.join(chunk_words)
+            # Get chunk content
+            chunk_content = ' '.join(words[start_idx:fit_idx])
+            chunk_word_count = fit_idx - start_idx
             
             # Skip chunks that are too small (unless it's the last chunk)
             if len(chunk_content) >= self.min_chunk_size or end_idx == total_words:
                 # Try to find a good breaking point (sentence boundary)
                 if end_idx < total_words:
-                    sentences = chunk_content.split('.')
-                    if len(sentences) > 1:
+                    last_period = chunk_content.rfind('.')
+                    if last_period != -1:
                         # Keep all but the last incomplete sentence
-                        chunk_content = '.'.join(sentences[:-1]) + '.'
+                        chunk_content = chunk_content[:last_period + 1]
+                        # Words kept run up to the one containing that period
+                        chunk_word_count = bisect_right(
+                            offsets, offsets[start_idx] + last_period, start_idx, fit_idx
+                        ) - start_idx
                 
                 chunk = TextChunk(
                     content=chunk_content.strip(),
@@ -251,14 +389,16 @@ class ContentProcessor:
                     title=metadata['title'],
                     chunk_index=chunk_num,
                     total_chunks=0,  # Will be updated later
-                    word_count=len(chunk_content.split()),
+                    word_count=chunk_word_count,
                     char_count=len(chunk_content),
                     content_type=metadata['content_type'],
                     keywords=metadata['keywords']
                 )
                 
                 # Extract section title if available
-                section_title = self._extract_section_title(chunk_content, metadata['headings'])
+                section_title = self._extract_section_title(
+                    chunk_content, metadata['headings'], heading_matcher
+                )
                 chunk.section_title = section_title
                 
                 chunks.append(chunk)
@@ -267,7 +407,7 @@ class ContentProcessor:
             # Move start index forward (with overlap)
             if end_idx == total_words:
                 break
-            start_idx = max(start_idx + words_per_chunk - overlap_words, start_idx + 1)
+            start_idx += stride
         
         # Update total_chunks for all chunks
         total_chunks = len(chunks)
@@ -276,10 +416,46 @@ class ContentProcessor:
         
         return chunks
     
-    def _extract_section_title(self, chunk_content: str, headings: List[Dict]) -> Optional[str]:
+    def _build_heading_matcher(self, headings: List[Dict]) -> Optional[Tuple[Any, int]]:
+        """
+        Index heading words for _extract_section_title.
+        
+        Returns an automaton mapping each heading word to the first heading that
+        contains it, plus the index of the first empty heading (which matches
+        any chunk), or None when pyahocorasick is not installed.
+        """
+        if ahocorasick is None:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        always_matches = len(headings)
+        for index, heading in enumerate(headings):
+            heading_text = heading['text'].lower()
+            if not heading_text:
+                always_matches = min(always_matches, index)
+            # A heading without words can still match as a whole
+            for word in heading_text.split() or [heading_text]:
+                if word and word not in automaton:
+                    automaton.add_word(word, index)
+        
+        if len(automaton) == 0:
+            return None if always_matches == len(headings) else (None, always_matches)
+        automaton.make_automaton()
+        return automaton, always_matches
+    
+    def _extract_section_title(self, chunk_content: str, headings: List[Dict],
+                               heading_matcher: Optional[Tuple[Any, int]] = None) -> Optional[str]:
         """Extract the most relevant section title for a chunk"""
         chunk_start = chunk_content[:200].lower()
         
+        if heading_matcher is not None:
+            # First heading with any word in the chunk start, in one pass
+            automaton, best = heading_matcher
+            if automaton is not None:
+                for _, index in automaton.iter(chunk_start):
+                    best = min(best, index)
+            return headings[best]['text'] if best < len(headings) else None
+        
         for heading in headings:
             heading_text = heading['text'].lower()
             if heading_text in chunk_start or any(word in chunk_start for word in heading_text.split()):
@@ -290,15 +466,18 @@ class ContentProcessor:
     def process_content(self, html_content: str, url: str) -> Dict[str, Any]:
         """Process HTML content into structured chunks"""
         try:
+            # Parse once; metadata is read before cleaning mutates the tree
+            tree = LexborHTMLParser(html_content)
+            
             # Extract metadata
-            metadata = self.extract_metadata(html_content, url)
+            metadata = self._extract_metadata(tree, html_content, url)
             
             # Clean HTML and convert to text
-            clean_content = self.clean_html(html_content)
+            clean_content = self._clean_tree(tree)
             metadata['word_count'] = len(clean_content.split())
             
             # Create chunks
-            chunks = self.create_chunks(clean_content, metadata)
+            chunks = self.create_chunks(clean_content, metadata, metadata['word_count'])
             
             return {
                 'success': True,
@@ -316,4 +495,4 @@ class ContentProcessor:
                 'success': False,
                 'error': str(e),
                 'url': url
-            } 
\ No newline at end of file
+            }
@@ -29,17 +29,49 @@ Author: AI Customer Support Agent Development Team
 License: MIT
 Version: 1.0.0
 """
-import json
 import csv
 import os
+import re
+import shutil
+from collections import Counter, defaultdict
 from typing import Dict, List, Any, Optional
 from datetime import datetime
-import pandas as pd
+import orjson
 from pathlib import Path
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Number of JSONL records serialized before each write call
+JSONL_WRITE_BATCH_SIZE = 1000
+
+# Write buffer for the per-content-type Markdown files (1 MiB)
+MARKDOWN_WRITE_BUFFER_SIZE = 1 << 20
+
+# Columns of the structured CSV export, in output order
+STRUCTURED_CSV_FIELDS = [
+    'chunk_id', 'source_url', 'title', 'content_type', 'section_title', 'chunk_index',
+    'total_chunks', 'word_count', 'char_count', 'keywords', 'content_preview', 'content_full'
+]
+
+# Write buffer for the structured CSV export (1 MiB)
+CSV_WRITE_BUFFER_SIZE = 1 << 20
+
+# Punctuation trimmed from both ends of a word before indexing
+INDEX_STRIP_CHARS = '.,!?;:"()[]{}'
+
+# A whitespace-delimited token made of 4+ letters, optionally wrapped in punctuation
+_INDEX_PUNCT = re.escape(INDEX_STRIP_CHARS)
+_SIGNIFICANT_WORD_RE = re.compile(
+    rf'(?<!\S)[{_INDEX_PUNCT}]*([^\W\d_]{{4,}})[{_INDEX_PUNCT}]*(?!\S)'
+)
+
+# Only the first few significant words of each chunk are indexed
+MAX_INDEXED_CONTENT_WORDS = 50
+
+# Field order of the posting arrays stored in the search index
+POSTING_FIELDS = ('chunk_id', 'url', 'title', 'content_type', 'relevance')
+
 class DataExporter:
     """
     Enhanced data export functionality for AI Customer Support Agent.
@@ -108,29 +140,59 @@ class DataExporter:
         """
         filepath = self.output_dir / filename
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            for chunk in chunks:
-                json.dump(chunk, f, ensure_ascii=False)
-                f.write('\n')
+        # Serialize with orjson (UTF-8, no ASCII escaping) and write in batches
+        with open(filepath, 'wb') as f:
+            for start in range(0, len(chunks), JSONL_WRITE_BATCH_SIZE):
+                batch = chunks[start:start + JSONL_WRITE_BATCH_SIZE]
+                f.write(b''.join(orjson.dumps(chunk, option=orjson.OPT_APPEND_NEWLINE) for chunk in batch))
         
         logger.info(f"Exported {len(chunks)} chunks to JSONL: {filepath}")
         return str(filepath)
     
-    def export_to_parquet(self, chunks: List[Dict[str, Any]], filename: str = "aven_chunks.parquet"):
-        """Export chunks to Parquet format for efficient storage and analysis"""
-        try:
-            filepath = self.output_dir / filename
+    def chunks_to_table(self, chunks: List[Dict[str, Any]]):
+        """
+        Build a columnar PyArrow table from chunk dictionaries.
+        
+        Columns follow first-seen key order and missing values become nulls.
+        The keywords list is flattened to a comma-separated string so the
+        table can be written to flat formats directly.
+        
+        Args:
+            chunks (List[Dict[str, Any]]): Processed content chunks with metadata
             
-            # Flatten the data for DataFrame
-            flattened_chunks = []
-            for chunk in chunks:
-                flat_chunk = chunk.copy()
+        Returns:
+            pyarrow.Table: One row per chunk
+            
+        Raises:
+            ImportError: If PyArrow is not installed
+        """
+        import pyarrow as pa
+        
+        column_names = list(dict.fromkeys(key for chunk in chunks for key in chunk))
+        if chunks and 'keywords' not in column_names:
+            column_names.append('keywords')
+        columns = {}
+        for name in column_names:
+            if name == 'keywords':
                 # Convert list fields to strings for CSV compatibility
-                flat_chunk['keywords'] = ', '.join(chunk.get('keywords', []))
-                flattened_chunks.append(flat_chunk)
+                values = [', '.join(chunk.get('keywords', [])) for chunk in chunks]
+            else:
+                values = [chunk.get(name) for chunk in chunks]
+            columns[name] = pa.array(values)
+        
+        return pa.table(columns)
+    
+    def export_to_parquet(self, chunks: List[Dict[str, Any]], filename: str = "aven_chunks.parquet",
+                          table=None):
+        """Export chunks to Parquet format for efficient storage and analysis, reusing a prebuilt table if given"""
+        try:
+            import pyarrow.parquet as pq
+            
+            filepath = self.output_dir / filename
             
-            df = pd.DataFrame(flattened_chunks)
-            df.to_parquet(filepath, index=False)
+            if table is None:
+                table = self.chunks_to_table(chunks)
+            pq.write_table(table, filepath, compression='zstd')
             
             logger.info(f"Exported {len(chunks)} chunks to Parquet: {filepath}")
             return str(filepath)
@@ -140,155 +202,193 @@ class DataExporter:
             return None
     
     def export_content_by_type(self, results: Dict[str, Any], output_subdir: str = "by_content_type"):
-        """Export content organized by content type"""
+        """Export content organized by content type in a single streaming pass over the chunks"""
         type_dir = self.output_dir / output_subdir
         type_dir.mkdir(exist_ok=True)
         
-        # Group chunks by content type
-        chunks_by_type = {}
-        for chunk in results.get('chunks', []):
-            content_type = chunk.get('content_type', 'unknown')
-            if content_type not in chunks_by_type:
-                chunks_by_type[content_type] = []
-            chunks_by_type[content_type].append(chunk)
-        
+        # Section bodies are streamed into one part file per content type, opened
+        # on first encounter; headers need the final count so they are written last
+        part_files = {}
+        section_counts = Counter()
         exported_files = {}
-        for content_type, chunks in chunks_by_type.items():
-            # Create markdown file for each content type
-            filename = f"{content_type}_content.md"
-            filepath = type_dir / filename
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(f"# Aven Support: {content_type.replace('_', ' ').title()}\n\n")
-                f.write(f"*Exported on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n")
-                f.write(f"**Total sections:** {len(chunks)}\n\n")
-                f.write("---\n\n")
+        try:
+            for chunk in results.get('chunks', []):
+                content_type = chunk.get('content_type', 'unknown')
+                f = part_files.get(content_type)
+                if f is None:
+                    part_path = type_dir / f"{content_type}_content.md.part"
+                    f = part_files[content_type] = open(
+                        part_path, 'w', encoding='utf-8', buffering=MARKDOWN_WRITE_BUFFER_SIZE
+                    )
+                section_counts[content_type] += 1
                 
-                for i, chunk in enumerate(chunks, 1):
-                    f.write(f"## {i}. {chunk.get('title', 'Untitled')}\n\n")
-                    f.write(f"**Source:** [{chunk['source_url']}]({chunk['source_url']})\n")
-                    if chunk.get('section_title'):
-                        f.write(f"**Section:** {chunk['section_title']}\n")
-                    f.write(f"**Chunk:** {chunk['chunk_index']}/{chunk['total_chunks']}\n\n")
-                    f.write(chunk['content'])
-                    f.write("\n\n---\n\n")
+                f.write(f"## {section_counts[content_type]}. {chunk.get('title', 'Untitled')}\n\n")
+                f.write(f"**Source:** [{chunk['source_url']}]({chunk['source_url']})\n")
+                if chunk.get('section_title'):
+                    f.write(f"**Section:** {chunk['section_title']}\n")
+                f.write(f"**Chunk:** {chunk['chunk_index']}/{chunk['total_chunks']}\n\n")
+                f.write(chunk['content'])
+                f.write("\n\n---\n\n")
             
-            exported_files[content_type] = str(filepath)
-            logger.info(f"Exported {len(chunks)} {content_type} chunks to: {filepath}")
+            for part in part_files.values():
+                part.close()
+            
+            for content_type, part in part_files.items():
+                # Create markdown file for each content type: header, then the streamed sections
+                filepath = type_dir / f"{content_type}_content.md"
+                
+                with open(filepath, 'w', encoding='utf-8', buffering=MARKDOWN_WRITE_BUFFER_SIZE) as f:
+                    f.write(f"# Aven Support: {content_type.replace('_', ' ').title()}\n\n")
+                    f.write(f"*Exported on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n")
+                    f.write(f"**Total sections:** {section_counts[content_type]}\n\n")
+                    f.write("---\n\n")
+                    with open(part.name, 'r', encoding='utf-8') as body:
+                        shutil.copyfileobj(body, f, MARKDOWN_WRITE_BUFFER_SIZE)
+                
+                exported_files[content_type] = str(filepath)
+                logger.info(f"Exported {section_counts[content_type]} {content_type} chunks to: {filepath}")
+        finally:
+            # Part files are temporary whether or not the export succeeded
+            for part in part_files.values():
+                part.close()
+                Path(part.name).unlink(missing_ok=True)
         
         return exported_files
     
     def export_structured_csv(self, results: Dict[str, Any], filename: str = "aven_structured.csv"):
-        """Export a comprehensive CSV with all metadata"""
+        """Export a comprehensive CSV with all metadata, streamed row by row"""
         filepath = self.output_dir / filename
         
-        csv_data = []
-        for chunk in results.get('chunks', []):
-            row = {
-                'chunk_id': chunk['chunk_id'],
-                'source_url': chunk['source_url'],
-                'title': chunk['title'],
-                'content_type': chunk['content_type'],
-                'section_title': chunk.get('section_title', ''),
-                'chunk_index': chunk['chunk_index'],
-                'total_chunks': chunk['total_chunks'],
-                'word_count': chunk['word_count'],
-                'char_count': chunk['char_count'],
-                'keywords': ', '.join(chunk.get('keywords', [])),
-                'content_preview': chunk['content'][:200] + '...' if len(chunk['content']) > 200 else chunk['content'],
-                'content_full': chunk['content']
-            }
-            csv_data.append(row)
-        
-        df = pd.DataFrame(csv_data)
-        df.to_csv(filepath, index=False, encoding='utf-8')
+        row_count = 0
+        with open(filepath, 'w', newline='', encoding='utf-8', buffering=CSV_WRITE_BUFFER_SIZE) as f:
+            writer = csv.DictWriter(f, fieldnames=STRUCTURED_CSV_FIELDS, lineterminator=os.linesep)
+            writer.writeheader()
+            for chunk in results.get('chunks', []):
+                content = chunk['content']
+                writer.writerow({
+                    'chunk_id': chunk['chunk_id'],
+                    'source_url': chunk['source_url'],
+                    'title': chunk['title'],
+                    'content_type': chunk['content_type'],
+                    'section_title': chunk.get('section_title', ''),
+                    'chunk_index': chunk['chunk_index'],
+                    'total_chunks': chunk['total_chunks'],
+                    'word_count': chunk['word_count'],
+                    'char_count': chunk['char_count'],
+                    'keywords': ', '.join(chunk.get('keywords', [])),
+                    'content_preview': content[:200] + '...' if len(content) > 200 else content,
+                    'content_full': content
+                })
+                row_count += 1
         
-        logger.info(f"Exported structured CSV with {len(csv_data)} rows: {filepath}")
+        logger.info(f"Exported structured CSV with {row_count} rows: {filepath}")
         return str(filepath)
     
     def create_search_index(self, chunks: List[Dict[str, Any]], filename: str = "search_index.json"):
         """Create a simple search index for the content"""
         filepath = self.output_dir / filename
         
-        # Create keyword-based search index
-        search_index = {
-            'created_at': datetime.now().isoformat(),
-            'total_chunks': len(chunks),
-            'index': {}
-        }
+        # Create keyword-based search index; each term maps to a list of
+        # postings laid out as POSTING_FIELDS
+        index = defaultdict(list)
+        
+        # Chunks of one page share a title, so its terms are computed once
+        title_terms = {}
         
         for chunk in chunks:
-            chunk_id = chunk['chunk_id']
             content = chunk['content'].lower()
-            title = chunk.get('title', '').lower()
             keywords = chunk.get('keywords', [])
             
-            # Extract searchable terms
-            terms = set()
+            # Extract searchable terms, deduplicated in first-seen order
+            terms = {}
             
             # Add words from content (significant words only)
-            content_words = [word.strip('.,!?;:"()[]{}') for word in content.split()]
-            significant_words = [word for word in content_words 
-                               if len(word) > 3 and word.isalpha()]
-            terms.update(significant_words[:50])  # Limit to first 50 significant words
+            significant_words = 0
+            for match in _SIGNIFICANT_WORD_RE.finditer(content):
+                word = match.group(1)
+                if not word.isalpha():
+                    continue
+                terms[word] = None
+                significant_words += 1
+                if significant_words == MAX_INDEXED_CONTENT_WORDS:
+                    break
             
             # Add title words
-            title_words = [word.strip('.,!?;:"()[]{}') for word in title.split()]
-            terms.update(title_words)
+            title = chunk.get('title', '')
+            if title not in title_terms:
+                title_terms[title] = dict.fromkeys(
+                    word.strip(INDEX_STRIP_CHARS) for word in title.lower().split()
+                )
+            terms.update(title_terms[title])
             
             # Add keywords
-            terms.update([kw.lower().strip() for kw in keywords])
+            terms.update(dict.fromkeys(kw.lower().strip() for kw in keywords))
             
-            # Add to index
+            # One posting per chunk, shared by all of its terms
+            posting = (
+                chunk['chunk_id'],
+                chunk['source_url'],
+                chunk.get('title', ''),
+                chunk.get('content_type', ''),
+                1.0  # Relevance; could implement TF-IDF scoring
+            )
             for term in terms:
-                if term not in search_index['index']:
-                    search_index['index'][term] = []
-                search_index['index'][term].append({
-                    'chunk_id': chunk_id,
-                    'url': chunk['source_url'],
-                    'title': chunk.get('title', ''),
-                    'content_type': chunk.get('content_type', ''),
-                    'relevance': 1.0  # Could implement TF-IDF scoring
-                })
+                index[term].append(posting)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(search_index, f, indent=2, ensure_ascii=False)
+        search_index = {
+            'created_at': datetime.now().isoformat(),
+            'total_chunks': len(chunks),
+            'posting_fields': POSTING_FIELDS,
+            'index': index
+        }
+        
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(search_index, option=orjson.OPT_INDENT_2))
         
         logger.info(f"Created search index with {len(search_index['index'])} terms: {filepath}")
         return str(filepath)
     
-    def export_url_sitemap(self, results: Dict[str, Any], filename: str = "scraped_urls.txt"):
-        """Export a simple sitemap of all scraped URLs"""
+    def export_url_sitemap(self, results: Dict[str, Any], filename: str = "scraped_urls.txt",
+                           sorted_urls: Optional[List[str]] = None):
+        """Export a simple sitemap of all scraped URLs (optionally pre-sorted by the caller)"""
         filepath = self.output_dir / filename
         
-        urls = results.get('scraped_urls', [])
+        urls = sorted_urls if sorted_urls is not None else sorted(results.get('scraped_urls', []))
         
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(f"# Aven Support URLs Scraped\n")
             f.write(f"# Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
             f.write(f"# Total URLs: {len(urls)}\n\n")
             
-            for url in sorted(urls):
+            for url in urls:
                 f.write(f"{url}\n")
         
         logger.info(f"Exported {len(urls)} URLs to sitemap: {filepath}")
         return str(filepath)
     
-    def create_summary_report(self, results: Dict[str, Any], filename: str = "scraping_report.md"):
-        """Create a comprehensive markdown report"""
+    def create_summary_report(self, results: Dict[str, Any], filename: str = "scraping_report.md",
+                              sorted_urls: Optional[List[str]] = None,
+                              sorted_failed_urls: Optional[List[str]] = None,
+                              chunk_table=None):
+        """Create a comprehensive markdown report (URL lists and chunk table optionally prebuilt by the caller)"""
         filepath = self.output_dir / filename
         
         stats = results.get('session_stats', {})
         chunks = results.get('chunks', [])
-        
-        # Analyze content types
-        content_type_counts = {}
-        word_count_by_type = {}
-        
-        for chunk in chunks:
-            content_type = chunk.get('content_type', 'unknown')
-            content_type_counts[content_type] = content_type_counts.get(content_type, 0) + 1
-            word_count_by_type[content_type] = word_count_by_type.get(content_type, 0) + chunk.get('word_count', 0)
+        if sorted_urls is None:
+            sorted_urls = sorted(results.get('scraped_urls', []))
+        if sorted_failed_urls is None:
+            sorted_failed_urls = sorted(results.get('failed_urls') or [])
+        
+        # Analyze content types: [chunk count, word count] per type
+        if chunk_table is not None and chunk_table.num_rows:
+            type_totals = self._totals_by_type(chunk_table)
+        else:
+            type_totals = defaultdict(lambda: [0, 0])
+            for chunk in chunks:
+                totals = type_totals[chunk.get('content_type', 'unknown')]
+                totals[0] += 1
+                totals[1] += chunk.get('word_count', 0)
         
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write("# Aven Support Scraping Report\n\n")
@@ -308,9 +408,8 @@ class DataExporter:
             f.write("| Content Type | Chunks | Words | Avg Words/Chunk |\n")
             f.write("|--------------|--------|-------|------------------|\n")
             
-            for content_type in sorted(content_type_counts.keys()):
-                chunk_count = content_type_counts[content_type]
-                word_count = word_count_by_type[content_type]
+            for content_type in sorted(type_totals):
+                chunk_count, word_count = type_totals[content_type]
                 avg_words = word_count / chunk_count if chunk_count > 0 else 0
                 
                 f.write(f"| {content_type.replace('_', ' ').title()} | {chunk_count} | {word_count:,} | {avg_words:.0f} |\n")
@@ -319,17 +418,41 @@ class DataExporter:
             
             # URLs Scraped
             f.write("## Scraped URLs\n\n")
-            for url in sorted(results.get('scraped_urls', [])):
+            for url in sorted_urls:
                 f.write(f"- [{url}]({url})\n")
             
-            if results.get('failed_urls'):
+            if sorted_failed_urls:
                 f.write("\n## Failed URLs\n\n")
-                for url in sorted(results.get('failed_urls', [])):
+                for url in sorted_failed_urls:
                     f.write(f"- {url}\n")
         
         logger.info(f"Created summary report: {filepath}")
         return str(filepath)
     
+    def _totals_by_type(self, chunk_table) -> Dict[str, List[int]]:
+        """Group a chunk table by content type into [chunk count, word count] pairs"""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        
+        def column(name, value_type, default):
+            if name not in chunk_table.column_names:
+                return pa.repeat(pa.scalar(default, value_type), chunk_table.num_rows)
+            return pc.fill_null(chunk_table[name].cast(value_type), default)
+        
+        grouped = pa.table({
+            'content_type': column('content_type', pa.string(), 'unknown'),
+            'word_count': column('word_count', pa.int64(), 0)
+        }).group_by('content_type').aggregate([('word_count', 'count'), ('word_count', 'sum')])
+        
+        return {
+            content_type: [chunk_count, word_count]
+            for content_type, chunk_count, word_count in zip(
+                grouped['content_type'].to_pylist(),
+                grouped['word_count_count'].to_pylist(),
+                grouped['word_count_sum'].to_pylist()
+            )
+        }
+    
     def export_all_formats(self, results: Dict[str, Any]) -> Dict[str, str]:
         """
         Export scraped results in all available formats for comprehensive coverage.
@@ -369,11 +492,24 @@ class DataExporter:
         chunks = results.get('chunks', [])
         exported_files = {}
         
+        # URL lists are sorted once and shared by the sitemap and the report
+        sorted_urls = sorted(results.get('scraped_urls', []))
+        sorted_failed_urls = sorted(results.get('failed_urls') or [])
+        
+        # The columnar chunk table is built once and shared by the report and Parquet
+        try:
+            chunk_table = self.chunks_to_table(chunks)
+        except ImportError:
+            chunk_table = None
+        
         # Standard exports
         exported_files['jsonl'] = self.export_to_jsonl(chunks)
         exported_files['structured_csv'] = self.export_structured_csv(results)
-        exported_files['sitemap'] = self.export_url_sitemap(results)
-        exported_files['report'] = self.create_summary_report(results)
+        exported_files['sitemap'] = self.export_url_sitemap(results, sorted_urls=sorted_urls)
+        exported_files['report'] = self.create_summary_report(
+            results, sorted_urls=sorted_urls, sorted_failed_urls=sorted_failed_urls,
+            chunk_table=chunk_table
+        )
         exported_files['search_index'] = self.create_search_index(chunks)
         
         # Content type exports
@@ -381,7 +517,7 @@ class DataExporter:
         exported_files.update(content_type_files)
         
         # Try Parquet export
-        parquet_file = self.export_to_parquet(chunks)
+        parquet_file = self.export_to_parquet(chunks, table=chunk_table)
         if parquet_file:
             exported_files['parquet'] = parquet_file
         
@@ -3,23 +3,41 @@
 Comprehensive CLI script for running the Aven Support Scraper
 """
 import sys
+import time
 import argparse
+import functools
+import importlib.util
+import io
 import logging
+from array import array
+from collections import Counter
 from pathlib import Path
-from datetime import datetime
 
-from aven_scraper import AvenScraper
-from data_exporter import DataExporter
-from config import config
+import orjson
+
+try:
+    # Optional incremental JSON parser, lets analyze stream large results files
+    import ijson
+except ImportError:
+    ijson = None
+
+# The scraper, exporter and configuration are imported by the commands that use
+# them, so `--help` and `analyze` do not pay for loading the scraping stack
 
 def setup_logging(verbose=False):
     """Setup logging with optional verbose mode"""
     level = logging.DEBUG if verbose else logging.INFO
     logging.basicConfig(
         level=level,
-        format='%(asctime)s - %(levelname)s - %(message)s'
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        stream=sys.stderr  # Keep log records apart from the banner and summaries on stdout
     )
 
+@functools.lru_cache(maxsize=None)
+def content_type_label(content_type):
+    """Human-readable label for a content type, e.g. 'support_article' -> 'Support Article'"""
+    return content_type.replace('_', ' ').title()
+
 def print_banner():
     """Print application banner"""
     print("""
@@ -31,6 +49,8 @@ def print_banner():
 
 def print_config_info():
     """Print current configuration"""
+    from config import config
+    
     print("📋 Configuration:")
     print(f"   • Base URL: {config.base_url}")
     print(f"   • Max pages: {config.max_subpages}")
@@ -41,6 +61,8 @@ def print_config_info():
 
 def validate_setup():
     """Validate that everything is set up correctly"""
+    from config import config
+    
     issues = []
     
     # Check API key
@@ -56,17 +78,15 @@ def validate_setup():
     except Exception as e:
         issues.append(f"❌ Cannot access output directory: {e}")
     
-    # Check dependencies
-    try:
-        from exa_py import Exa
+    # Check dependencies (located without importing them)
+    if importlib.util.find_spec('exa_py') is not None:
         print("✅ Exa.ai Python SDK available")
-    except ImportError:
+    else:
         issues.append("❌ exa-py package not installed")
     
-    try:
-        import pandas as pd
+    if importlib.util.find_spec('pandas') is not None:
         print("✅ Pandas available for data processing")
-    except ImportError:
+    else:
         issues.append("❌ pandas package not installed")
     
     if issues:
@@ -81,6 +101,9 @@ def validate_setup():
 
 def run_scraper(args):
     """Run the main scraping process"""
+    from aven_scraper import AvenScraper
+    from config import config
+    
     print("🚀 Starting Aven support page scraping...")
     
     # Override config with command line arguments
@@ -102,7 +125,7 @@ def run_scraper(args):
     scraper = AvenScraper(api_key=args.api_key)
     
     # Run scraping
-    start_time = datetime.now()
+    start_time = time.perf_counter()
     results = scraper.scrape_support_pages()
     
     if not results['success']:
@@ -111,9 +134,11 @@ def run_scraper(args):
     
     # Print results summary
     stats = results['session_stats']
-    duration = (datetime.now() - start_time).total_seconds() / 60
+    duration = (time.perf_counter() - start_time) / 60
     
-    print(f"""
+    # The summary is rendered into one buffer and written to stdout in a single call
+    summary = io.StringIO()
+    summary.write(f"""
 🎉 Scraping completed successfully!
 
 📊 Results Summary:
@@ -123,33 +148,49 @@ def run_scraper(args):
    • URLs failed: {stats['urls_failed']}
    • Total chunks: {results['total_chunks']}
    • Total words: {stats['total_words']:,}
+
 """)
     
     # Content type breakdown
     if stats.get('content_types'):
-        print("📚 Content Types Found:")
-        for content_type, count in stats['content_types'].items():
-            print(f"   • {content_type.replace('_', ' ').title()}: {count} chunks")
-        print()
+        summary.write("📚 Content Types Found:\n")
+        summary.write("".join(
+            f"   • {content_type_label(content_type)}: {count} chunks\n"
+            for content_type, count in stats['content_types'].items()
+        ))
+        summary.write("\n")
+    sys.stdout.write(summary.getvalue())
+    sys.stdout.flush()
     
     # Export in additional formats if requested
     if args.export_all:
+        from data_exporter import DataExporter
+        
         print("📦 Exporting in all formats...")
         exporter = DataExporter(config.output_dir)
         exported_files = exporter.export_all_formats(results)
         
-        print("📁 Exported files:")
-        for export_type, filepath in exported_files.items():
-            print(f"   • {export_type}: {filepath}")
-        print()
+        sys.stdout.write("📁 Exported files:\n" + "".join(
+            f"   • {export_type}: {filepath}\n" for export_type, filepath in exported_files.items()
+        ) + "\n")
     
     print(f"📁 All output saved to: {config.output_dir}/")
     return True
 
+def iter_json_items(path, prefix):
+    """Yield the items under prefix (e.g. 'chunks.item') from a JSON file without loading it whole"""
+    with open(path, 'rb') as f:
+        yield from ijson.items(f, prefix)
+
+def iter_jsonl(path):
+    """Yield the record on each non-empty line of a JSON Lines file"""
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield orjson.loads(line)
+
 def analyze_results(args):
-    """Analyze previously scraped results"""
-    import json
-    
+    """Analyze previously scraped results (results JSON or chunks JSON Lines)"""
     results_file = Path(args.results_file)
     if not results_file.exists():
         print(f"❌ Results file not found: {results_file}")
@@ -157,40 +198,95 @@ def analyze_results(args):
     
     print(f"📊 Analyzing results from: {results_file}")
     
-    with open(results_file, 'r', encoding='utf-8') as f:
-        results = json.load(f)
-    
-    # Basic statistics
-    chunks = results.get('chunks', [])
-    stats = results.get('session_stats', {})
+    if results_file.suffix == '.jsonl':
+        # Chunk JSON Lines are read line by line; they carry no URL list, so
+        # scraped pages are counted from the chunks' source URLs
+        chunks = iter_jsonl(results_file)
+        scraped_urls = None
+        if args.export_analysis:
+            chunks = list(chunks)
+            results = {'chunks': chunks}
+    elif args.export_analysis or ijson is None:
+        # Exporting needs the full results in memory
+        results = orjson.loads(results_file.read_bytes())
+        chunks = results.get('chunks', [])
+        scraped_urls = results.get('scraped_urls', [])
+    else:
+        # Stream chunks and URLs so memory stays flat on large results files
+        chunks = iter_json_items(results_file, 'chunks.item')
+        scraped_urls = iter_json_items(results_file, 'scraped_urls.item')
+    
+    # Basic statistics and content types, gathered in a single pass; word
+    # counts are packed into a compact int64 buffer for vectorized statistics
+    word_counts = array('q')
+    source_urls = set() if scraped_urls is None else None
+    
+    def chunk_content_types():
+        for chunk in chunks:
+            word_counts.append(chunk.get('word_count', 0))
+            if source_urls is not None and chunk.get('source_url'):
+                source_urls.add(chunk['source_url'])
+            yield chunk.get('content_type', 'unknown')
+    
+    # Counter tallies the yielded types in C while the generator keeps the running totals
+    content_types = Counter(chunk_content_types())
+    if source_urls is not None:
+        scraped_urls = list(source_urls)
+        if args.export_analysis:
+            results['scraped_urls'] = scraped_urls
+    scraped_url_count = sum(1 for _ in scraped_urls)
+    
+    import numpy as np
+    
+    word_count_array = np.frombuffer(word_counts, dtype=np.int64)
+    total_chunks = len(word_count_array)
+    total_words = int(word_count_array.sum())
+    if total_chunks:
+        average_words = word_count_array.mean()
+        median_words, p95_words = np.percentile(word_count_array, [50, 95])
+    else:
+        average_words = median_words = p95_words = 0
     
     print(f"""
 📈 Analysis Results:
-   • Total chunks: {len(chunks)}
-   • Total words: {sum(chunk.get('word_count', 0) for chunk in chunks):,}
-   • Average chunk size: {sum(chunk.get('word_count', 0) for chunk in chunks) / len(chunks):.0f} words
-   • Scraped URLs: {len(results.get('scraped_urls', []))}
+   • Total chunks: {total_chunks}
+   • Total words: {total_words:,}
+   • Average chunk size: {average_words:.0f} words
+   • Median chunk size: {median_words:.0f} words
+   • 95th percentile chunk size: {p95_words:.0f} words
+   • Scraped URLs: {scraped_url_count}
 """)
     
-    # Content type analysis
-    content_types = {}
-    for chunk in chunks:
-        ct = chunk.get('content_type', 'unknown')
-        content_types[ct] = content_types.get(ct, 0) + 1
-    
     print("📚 Content Type Distribution:")
-    for ct, count in sorted(content_types.items(), key=lambda x: x[1], reverse=True):
-        percentage = (count / len(chunks)) * 100
-        print(f"   • {ct.replace('_', ' ').title()}: {count} chunks ({percentage:.1f}%)")
+    for ct, count in content_types.most_common():
+        percentage = (count / total_chunks) * 100
+        print(f"   • {content_type_label(ct)}: {count} chunks ({percentage:.1f}%)")
     
     # Export analysis if requested
     if args.export_analysis:
+        from data_exporter import DataExporter
+        
         exporter = DataExporter(Path(results_file).parent)
         analysis_files = exporter.export_all_formats(results)
         print(f"\n📁 Analysis exported to: {len(analysis_files)} files")
     
     return True
 
+def scrape_command(args):
+    """Show the configuration, validate it and run the scraper"""
+    print_config_info()
+    return validate_setup() and run_scraper(args)
+
+def validate_command(args):
+    """Show the configuration and validate it"""
+    print_config_info()
+    return validate_setup()
+
+def config_command(args):
+    """Show the configuration"""
+    print_config_info()
+    return True
+
 def main():
     """Main CLI entry point"""
     parser = argparse.ArgumentParser(
@@ -202,6 +298,7 @@ Examples:
   %(prog)s scrape --max-pages 100        # Scrape up to 100 pages
   %(prog)s scrape --export-all           # Scrape and export all formats
   %(prog)s analyze results.json          # Analyze previous results
+  %(prog)s analyze chunks.jsonl          # Analyze streamed chunk output
   %(prog)s validate                      # Check configuration
         """
     )
@@ -217,20 +314,24 @@ Examples:
     scrape_parser.add_argument('--export-all', action='store_true', 
                                help='Export results in all available formats')
     scrape_parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
+    scrape_parser.set_defaults(func=scrape_command)
     
     # Analyze command
     analyze_parser = subparsers.add_parser('analyze', help='Analyze scraped results')
-    analyze_parser.add_argument('results_file', help='Path to results JSON file')
+    analyze_parser.add_argument('results_file', help='Path to results JSON or chunks JSONL file')
     analyze_parser.add_argument('--export-analysis', action='store_true',
                                 help='Export analysis in multiple formats')
     analyze_parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
+    analyze_parser.set_defaults(func=analyze_results)
     
     # Validate command
     validate_parser = subparsers.add_parser('validate', help='Validate configuration')
     validate_parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
+    validate_parser.set_defaults(func=validate_command)
     
     # Config command
     config_parser = subparsers.add_parser('config', help='Show current configuration')
+    config_parser.set_defaults(func=config_command)
     
     args = parser.parse_args()
     
@@ -240,38 +341,12 @@ Examples:
     # Setup logging
     setup_logging(getattr(args, 'verbose', False))
     
-    # Handle commands
-    if args.command == 'scrape':
-        print_config_info()
-        if not validate_setup():
-            return 1
-        
-        if run_scraper(args):
-            return 0
-        else:
-            return 1
-            
-    elif args.command == 'analyze':
-        setup_logging(args.verbose)
-        if analyze_results(args):
-            return 0
-        else:
-            return 1
-            
-    elif args.command == 'validate':
-        print_config_info()
-        if validate_setup():
-            return 0
-        else:
-            return 1
-            
-    elif args.command == 'config':
-        print_config_info()
-        return 0
-        
-    else:
+    # Handle commands: each subcommand registers its handler as args.func
+    if not hasattr(args, 'func'):
         parser.print_help()
         return 1
+    
+    return 0 if args.func(args) else 1
 
 if __name__ == "__main__":
     sys.exit(main()) 
\ No newline at end of file
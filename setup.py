@@ -25,9 +25,13 @@ Requirements:
 Author: AI Customer Support Agent Development Team
 License: MIT
 """
+import hashlib
+import importlib.util
 import os
 import sys
+import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 def print_banner():
@@ -48,9 +52,10 @@ def install_dependencies():
     """
     Install required Python packages from requirements.txt.
     
-    Uses pip to install all dependencies specified in requirements.txt, including:
+    Uses uv's parallel installer when it is on PATH, otherwise pip preferring
+    prebuilt wheels, to install all dependencies specified in requirements.txt, including:
     - exa-py for intelligent web search
-    - beautifulsoup4 for HTML parsing
+    - selectolax for HTML parsing
     - pandas for data processing
     - aiohttp for async web requests
     - pydantic for configuration management
@@ -63,8 +68,17 @@ def install_dependencies():
     """
     print("📦 Installing dependencies...")
     
+    if shutil.which("uv"):
+        # uv resolves and downloads packages in parallel into this interpreter
+        command = ["uv", "pip", "install", "--python", sys.executable, "-r", "requirements.txt"]
+    else:
+        # Prefer wheels over building sdists and skip pip's interactive/version checks
+        command = [sys.executable, "-m", "pip", "install", "--prefer-binary", "--no-input",
+                   "-r", "requirements.txt"]
+    env = dict(os.environ, PIP_DISABLE_PIP_VERSION_CHECK="1", PIP_NO_PYTHON_VERSION_WARNING="1")
+    
     try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
+        subprocess.check_call(command, env=env)
         print("✅ Dependencies installed successfully!")
         return True
     except subprocess.CalledProcessError as e:
@@ -88,9 +102,8 @@ def create_env_file():
         print("❌ config.template not found!")
         return False
     
-    # Copy template to .env
-    with open(template_file, 'r') as src, open(env_file, 'w') as dst:
-        dst.write(src.read())
+    # Copy template to .env (in-kernel copy where the OS supports it)
+    shutil.copyfile(template_file, env_file)
     
     print("✅ Created .env file from template")
     
@@ -98,14 +111,9 @@ def create_env_file():
     api_key = input("\n🔑 Please enter your Exa.ai API key (or press Enter to skip): ").strip()
     
     if api_key:
-        # Update .env file with API key
-        with open(env_file, 'r') as f:
-            content = f.read()
-        
-        content = content.replace('your_exa_api_key_here', api_key)
-        
-        with open(env_file, 'w') as f:
-            f.write(content)
+        # Update .env file with API key, substituting on the raw bytes
+        content = env_file.read_bytes()
+        env_file.write_bytes(content.replace(b'your_exa_api_key_here', api_key.encode()))
         
         print("✅ API key saved to .env file")
     else:
@@ -122,52 +130,87 @@ def create_directories():
     - scraped_data/content_chunks/: Individual markdown chunks for RAG pipeline
     - scraped_data/by_content_type/: Content organized by type (FAQ, guides, etc.)
     
-    All directories are created with parents=True to handle nested structures
-    and exist_ok=True to avoid errors if directories already exist.
+    Only the leaf directories are created; os.makedirs creates the shared
+    scraped_data/ parent along with the first one, and exist_ok=True avoids
+    errors if directories already exist.
     
     Returns:
         bool: Always returns True (directory creation is idempotent)
     """
     print("\n📁 Creating directories...")
     
-    directories = [
-        "scraped_data",
+    leaf_directories = [
         "scraped_data/content_chunks",
         "scraped_data/by_content_type"
     ]
     
-    for directory in directories:
-        Path(directory).mkdir(parents=True, exist_ok=True)
+    for directory in leaf_directories:
+        os.makedirs(directory, exist_ok=True)
+    
+    for directory in ["scraped_data"] + leaf_directories:
         print(f"✅ Created: {directory}/")
     
     return True
 
+# Project modules checked by verify_installation: (module, name it must provide, success message)
+PROJECT_MODULE_CHECKS = (
+    ('config', 'config', "✅ Configuration module loaded"),
+    ('content_processor', 'ContentProcessor', "✅ Content processor available"),
+    ('aven_scraper', 'AvenScraper', "✅ Main scraper available"),
+)
+
+# Written after a successful verification; lets later runs skip the checks
+SETUP_MARKER_FILE = Path("scraped_data/.setup_ok")
+
+def setup_fingerprint():
+    """
+    Fingerprint of everything verify_installation depends on.
+    
+    Combines a SHA-256 of requirements.txt and the verified project modules
+    with the running Python version, so any change there forces a re-check.
+    """
+    digest = hashlib.sha256()
+    for filename in ["requirements.txt"] + [f"{module_name}.py" for module_name, _, _ in PROJECT_MODULE_CHECKS]:
+        path = Path(filename)
+        digest.update(path.read_bytes() if path.exists() else b"")
+    return f"{digest.hexdigest()}:{sys.version}"
+
+def import_name(module_name, name):
+    """Equivalent of `from module_name import name`, callable from a worker thread"""
+    module = importlib.import_module(module_name)
+    try:
+        return getattr(module, name)
+    except AttributeError:
+        raise ImportError(f"cannot import name '{name}' from '{module_name}'") from None
+
 def verify_installation():
     """Verify that everything is installed correctly"""
     print("\n🔍 Verifying installation...")
     
+    fingerprint = setup_fingerprint()
+    if SETUP_MARKER_FILE.exists() and SETUP_MARKER_FILE.read_text(encoding='utf-8') == fingerprint:
+        print("✅ Installation already verified (requirements, modules and Python unchanged)")
+        return True
+    
     try:
-        # Test imports
-        import exa_py
-        print("✅ exa-py package available")
-        
-        import pandas as pd
-        print("✅ pandas package available")
-        
-        import bs4
-        print("✅ beautifulsoup4 package available")
-        
-        # Test configuration
-        from config import config
-        print("✅ Configuration module loaded")
+        # Test third-party packages are installed (located without importing them)
+        for module_name, package_name in (('exa_py', 'exa-py'), ('pandas', 'pandas'),
+                                          ('selectolax', 'selectolax')):
+            if importlib.util.find_spec(module_name) is None:
+                raise ImportError(f"No module named '{module_name}'")
+            print(f"✅ {package_name} package available")
         
-        # Test content processor
-        from content_processor import ContentProcessor
-        print("✅ Content processor available")
+        # Test configuration, content processor and main scraper; the imports
+        # run concurrently, results are reported in order
+        with ThreadPoolExecutor(max_workers=len(PROJECT_MODULE_CHECKS)) as executor:
+            futures = [executor.submit(import_name, module_name, name)
+                       for module_name, name, _ in PROJECT_MODULE_CHECKS]
+        for future, (_, _, message) in zip(futures, PROJECT_MODULE_CHECKS):
+            future.result()  # Re-raises the module's import error
+            print(message)
         
-        # Test main scraper
-        from aven_scraper import AvenScraper
-        print("✅ Main scraper available")
+        SETUP_MARKER_FILE.parent.mkdir(parents=True, exist_ok=True)
+        SETUP_MARKER_FILE.write_text(fingerprint, encoding='utf-8')
         
         print("\n🎉 Installation verified successfully!")
         return True